@@ -0,0 +1 @@
+"""SyncGaze offline analysis: metric kernels and the 101_ver analysis script."""
@@ -9,6 +9,9 @@ summary tables:
 
 Results are printed to the console and also written to CSV files
 alongside the source data.
+
+Run from the repository root with ``python -m analysis.analyze_101``
+(running the file directly also works).
 """
 
 from __future__ import annotations
@@ -20,23 +23,19 @@ from typing import Dict, List
 import numpy as np
 import pandas as pd
 
-# Ensure local modules (syncgaze_metrics.py) are importable
-# Ensure local modules (syncgaze_metrics.py) are importable
-HERE = Path(__file__).resolve().parent
-search_paths = [
-    HERE,
-    HERE / "analysis",
-    HERE.parent,
-    HERE.parent / "SyncGaze",
-    HERE.parent / "SyncGaze" / "analysis",
-]
-for path in search_paths:
-    if path.exists():
-        resolved = str(path.resolve())
-        if resolved not in sys.path:
-            sys.path.insert(0, resolved)
-
-import syncgaze_metrics as sm
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+except ImportError:  # pyarrow is optional; fall back to the pandas parser
+    pa = pacsv = None
+
+if __package__:  # python -m analysis.analyze_101
+    from . import syncgaze_metrics as sm
+else:
+    # Run as a script: import through the package all the same, so the numba
+    # on-disk cache always sees one module name (analysis.syncgaze_metrics).
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from analysis import syncgaze_metrics as sm
 
 
 def locate_csv() -> Path:
@@ -46,6 +45,7 @@ def locate_csv() -> Path:
         Path("SyncGaze/analysis/gaze_mouse_task_data_(101_ver).csv"),
         Path.cwd() / "gaze_mouse_task_data_(101_ver).csv",
         Path.cwd() / "SyncGaze" / "analysis" / "gaze_mouse_task_data_(101_ver).csv",
+        Path(__file__).with_name("gaze_mouse_task_data_(101_ver).csv"),
     ]
     for cand in candidates:
         if cand.exists():
@@ -53,9 +53,35 @@ def locate_csv() -> Path:
     raise FileNotFoundError("Could not locate gaze_mouse_task_data_(101_ver).csv.")
 
 
+def read_raw_csv(csv_path: Path) -> pd.DataFrame:
+    """Read the CSV as-is, skipping '#' comment lines (pyarrow reader if available)."""
+    if pacsv is None:
+        return pd.read_csv(csv_path, comment="#", skipinitialspace=True)
+    data = csv_path.read_bytes()
+    # Leading comment lines (the exported files start with one) are skipped by
+    # pyarrow itself; it has no comment option, so any '#' further down
+    # (inline comment, '#' in a quoted field) goes to pandas' parser instead.
+    pos = 0
+    skip_rows = 0
+    while True:
+        end = data.find(b"\n", pos)
+        end = len(data) if end < 0 else end + 1
+        if not data[pos:end].lstrip().startswith(b"#"):
+            break
+        skip_rows += 1
+        pos = end
+    if data.find(b"#", pos) >= 0:
+        return pd.read_csv(csv_path, comment="#", skipinitialspace=True)
+    table = pacsv.read_csv(pa.BufferReader(data),
+                           read_options=pacsv.ReadOptions(skip_rows=skip_rows))
+    raw_df = table.to_pandas()
+    raw_df.columns = raw_df.columns.str.strip()
+    return raw_df
+
+
 def load_dataframe(csv_path: Path) -> pd.DataFrame:
     """Read and clean the CSV into a numeric dataframe."""
-    raw_df = pd.read_csv(csv_path, comment="#", skipinitialspace=True)
+    raw_df = read_raw_csv(csv_path)
     original_rows = len(raw_df)
     numeric_cols = [
         "timestamp",
@@ -70,10 +96,23 @@ def load_dataframe(csv_path: Path) -> pd.DataFrame:
     for col in numeric_cols:
         raw_df[col] = pd.to_numeric(raw_df[col], errors="coerce")
 
-    filled = (
-        raw_df.groupby("taskId", dropna=False, group_keys=False)
-        .apply(lambda g: g.sort_values("timestamp").interpolate(limit_direction="both").ffill().bfill())
-    )
+    # Interpolate gaps within each taskId without a per-group apply: pin the
+    # first/last row of every group to the group's first/last valid value so a
+    # single linear interpolation over the sorted frame never crosses a group
+    # boundary, then blank out columns that had no valid value in the group.
+    filled = raw_df.sort_values(["taskId", "timestamp"], kind="mergesort").reset_index(drop=True)
+    value_cols = [c for c in numeric_cols if c != "taskId"]
+    task_ids = filled["taskId"]
+    grp_start = task_ids.ne(task_ids.shift()).to_numpy()[:, None]
+    grp_end = task_ids.ne(task_ids.shift(-1)).to_numpy()[:, None]
+    grouped = filled.groupby("taskId", dropna=False, sort=False)[value_cols]
+    first = grouped.transform("first").to_numpy()
+    last = grouped.transform("last").to_numpy()
+    values = filled[value_cols].to_numpy(dtype=np.float64)
+    values = np.where(grp_start & np.isnan(values), first, values)
+    values = np.where(grp_end & np.isnan(values), last, values)
+    interpolated = pd.DataFrame(values, columns=value_cols).interpolate(limit_area="inside")
+    filled[value_cols] = interpolated.where(~np.isnan(first))
     filled["taskId"] = filled["taskId"].round().astype(int)
     df = filled.dropna(subset=numeric_cols).copy()
     if df.empty:
@@ -83,6 +122,11 @@ def load_dataframe(csv_path: Path) -> pd.DataFrame:
             f"Check required columns. Missing counts: {missing_counts}"
         )
     df = df.sort_values(["taskId", "timestamp"]).reset_index(drop=True)
+    # Pixel coordinates fit float32 comfortably and halve the bytes the metric
+    # kernels stream; timestamps stay float64 (absolute ms lose sub-ms precision
+    # in float32 once a session runs for a few minutes).
+    df = df.astype({c: np.float32 for c in value_cols if c != "timestamp"})
+    df["taskId"] = df["taskId"].astype(np.int32)
     return df
 
 
@@ -96,35 +140,12 @@ def raw_column_missing(df: pd.DataFrame, cols: List[str], total_rows: int) -> Di
 
 def compute_metrics(df: pd.DataFrame, params: sm.Params) -> pd.DataFrame:
     """Compute SyncGaze metrics per taskId."""
-    rows: List[Dict] = []
-    for tid, group in df.groupby("taskId", sort=True):
-        metrics = sm.compute_all_metrics(group, params)
-        metrics["taskId"] = tid
-        rows.append(metrics)
-    return pd.DataFrame(rows).sort_values("taskId").reset_index(drop=True)
+    return sm.compute_metrics_batch(df, params)
 
 
 def derive_spatial_sync(df: pd.DataFrame) -> pd.DataFrame:
     """Extra spatial sync features per taskId."""
-    records: List[Dict] = []
-    for tid, group in df.groupby("taskId", sort=True):
-        target = np.column_stack((group["targetX"], group["targetY"]))
-        gaze = np.column_stack((group["gazeX"], group["gazeY"]))
-        mouse = np.column_stack((group["mouseX"], group["mouseY"]))
-
-        gaze_dist = np.linalg.norm(gaze - target, axis=1)
-        mouse_dist = np.linalg.norm(mouse - target, axis=1)
-        gap = np.abs(gaze_dist - mouse_dist)
-
-        records.append(
-            {
-                "taskId": tid,
-                "avgGazeTargetDist": float(np.mean(gaze_dist)),
-                "avgMouseTargetDist": float(np.mean(mouse_dist)),
-                "avgGazeMouseGap": float(np.mean(gap)),
-            }
-        )
-    return pd.DataFrame(records)
+    return sm.compute_spatial_sync_batch(df)
 
 
 def main() -> None:
@@ -25,35 +25,24 @@ Assumptions (edit as needed):
 """
 
 from dataclasses import dataclass
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, NamedTuple, Optional, Tuple
 import argparse
 import math
+import os
+import sys
 import numpy as np
 import pandas as pd
 
-# ---------------------------- Utilities ----------------------------
-
-def euclidean(x1, y1, x2, y2):
-    return math.hypot(x2 - x1, y2 - y1)
-
-def vector(a: Tuple[float, float], b: Tuple[float, float]) -> Tuple[float, float]:
-    return (b[0] - a[0], b[1] - a[1])
-
-def dot(u: Tuple[float, float], v: Tuple[float, float]) -> float:
-    return u[0]*v[0] + u[1]*v[1]
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional: kernels then run as plain Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+    prange = range
 
-def norm(u: Tuple[float, float]) -> float:
-    return math.hypot(u[0], u[1])
-
-def cosine_similarity(u: Tuple[float, float], v: Tuple[float, float]) -> float:
-    nu, nv = norm(u), norm(v)
-    if nu == 0 or nv == 0:
-        return 0.0
-    return dot(u, v) / (nu * nv)
-
-def direction_angle(u: Tuple[float, float]) -> float:
-    # angle in radians
-    return math.atan2(u[1], u[0])
+# ---------------------------- Utilities ----------------------------
 
 def stddev(x: np.ndarray) -> float:
     if len(x) <= 1:
@@ -65,15 +54,75 @@ def rolling_diff(arr: np.ndarray) -> np.ndarray:
         return np.array([])
     return np.diff(arr)
 
+@njit(cache=True, fastmath=True)
+def _path_length(xs, ys):
+    # summed segment lengths in one pass (no diff/hypot temporary arrays)
+    pl = 0.0
+    for i in range(1, xs.size):
+        pl += math.hypot(xs[i] - xs[i-1], ys[i] - ys[i-1])
+    return pl
+
 def path_length(xs: np.ndarray, ys: np.ndarray) -> float:
-    if len(xs) < 2:
-        return 0.0
-    dx = np.diff(xs)
-    dy = np.diff(ys)
-    return float(np.sum(np.hypot(dx, dy)))
+    return float(_path_length(xs, ys))
 
 # ---------------------------- Detection helpers ----------------------------
 
+@njit(cache=True)
+def _segments(ts, xs, ys, vel_thresh, min_duration_ms, starts, ends):
+    # Run-length segmentation of samples whose velocity (px/ms) exceeds vel_thresh;
+    # the first sample and zero-dt steps have zero velocity. Fills starts/ends
+    # with the runs lasting at least min_duration_ms and returns their count.
+    n = ts.size
+    count = 0
+    start = -1
+    for i in range(n + 1):
+        active = False
+        if 0 < i < n:
+            dt = ts[i] - ts[i-1]
+            if dt != 0.0:
+                active = math.hypot(xs[i] - xs[i-1], ys[i] - ys[i-1]) / dt > vel_thresh
+        elif i == 0:
+            active = 0.0 > vel_thresh
+        if active and start < 0:
+            start = i
+        elif not active and start >= 0:
+            end = i - 1
+            if ts[end] - ts[start] >= min_duration_ms:
+                starts[count] = start
+                ends[count] = end
+                count += 1
+            start = -1
+    return count
+
+def _detect_segments(xs: np.ndarray,
+                     ys: np.ndarray,
+                     ts: np.ndarray,
+                     vel_thresh: float,
+                     min_duration_ms: float) -> Tuple[np.ndarray, ...]:
+    """
+    Run-length segmentation of samples whose velocity exceeds vel_thresh.
+    Returns arrays (start_idx, end_idx, startTime, endTime, dir_x, dir_y),
+    one entry per run lasting at least min_duration_ms.
+    """
+    starts = np.empty(ts.size, dtype=np.int64)
+    ends = np.empty(ts.size, dtype=np.int64)
+    k = _segments(ts, xs, ys, float(vel_thresh), float(min_duration_ms), starts, ends)
+    starts, ends = starts[:k], ends[:k]
+    return (starts, ends, ts[starts], ts[ends],
+            xs[ends] - xs[starts], ys[ends] - ys[starts])
+
+def _segment_dicts(segments: Tuple[np.ndarray, ...]) -> List[Dict]:
+    return [
+        {
+            'start_idx': int(s),
+            'end_idx': int(e),
+            'startTime': float(st),
+            'endTime': float(et),
+            'direction': (float(vx), float(vy))
+        }
+        for s, e, st, et, vx, vy in zip(*segments)
+    ]
+
 def detect_movements(df: pd.DataFrame,
                      vel_thresh: float,
                      min_duration_ms: int) -> List[Dict]:
@@ -81,92 +130,77 @@ def detect_movements(df: pd.DataFrame,
     Detect movement segments based on velocity threshold.
     Returns list of dicts with keys: start_idx, end_idx, startTime, endTime, direction(vec)
     """
-    # velocity magnitude (pixels / ms)
-    dx = df['mouseX'].diff().fillna(0.0).to_numpy()
-    dy = df['mouseY'].diff().fillna(0.0).to_numpy()
-    dt = df['timestamp'].diff().fillna(1.0).to_numpy()
-    # avoid division by zero
-    dt[dt == 0] = np.nan
-    vel = np.hypot(dx, dy) / dt  # px per ms
-    vel = np.nan_to_num(vel, nan=0.0)
-
-    active = vel > vel_thresh
-    segments = []
-    i = 0
-    n = len(df)
-    while i < n:
-        if active[i]:
-            start = i
-            while i + 1 < n and active[i+1]:
-                i += 1
-            end = i
-            # check duration
-            dur = df['timestamp'].iloc[end] - df['timestamp'].iloc[start]
-            if dur >= min_duration_ms:
-                vx = df['mouseX'].iloc[end] - df['mouseX'].iloc[start]
-                vy = df['mouseY'].iloc[end] - df['mouseY'].iloc[start]
-                segments.append({
-                    'start_idx': start,
-                    'end_idx': end,
-                    'startTime': float(df['timestamp'].iloc[start]),
-                    'endTime': float(df['timestamp'].iloc[end]),
-                    'direction': (float(vx), float(vy))
-                })
-        i += 1
-    return segments
+    return _segment_dicts(_detect_segments(df['mouseX'].to_numpy(dtype=np.float64),
+                                           df['mouseY'].to_numpy(dtype=np.float64),
+                                           df['timestamp'].to_numpy(dtype=np.float64),
+                                           vel_thresh, min_duration_ms))
 
 def detect_gaze_movements(df: pd.DataFrame,
                           vel_thresh: float,
                           min_duration_ms: int) -> List[Dict]:
-    dx = df['gazeX'].diff().fillna(0.0).to_numpy()
-    dy = df['gazeY'].diff().fillna(0.0).to_numpy()
-    dt = df['timestamp'].diff().fillna(1.0).to_numpy()
-    dt[dt == 0] = np.nan
-    vel = np.hypot(dx, dy) / dt
-    vel = np.nan_to_num(vel, nan=0.0)
-
-    active = vel > vel_thresh
-    segments = []
-    i = 0
-    n = len(df)
-    while i < n:
-        if active[i]:
-            start = i
-            while i + 1 < n and active[i+1]:
-                i += 1
-            end = i
-            dur = df['timestamp'].iloc[end] - df['timestamp'].iloc[start]
-            if dur >= min_duration_ms:
-                vx = df['gazeX'].iloc[end] - df['gazeX'].iloc[start]
-                vy = df['gazeY'].iloc[end] - df['gazeY'].iloc[start]
-                segments.append({
-                    'start_idx': start,
-                    'end_idx': end,
-                    'startTime': float(df['timestamp'].iloc[start]),
-                    'endTime': float(df['timestamp'].iloc[end]),
-                    'direction': (float(vx), float(vy))
-                })
-        i += 1
-    return segments
-
-def first_time_inside_radius(df: pd.DataFrame,
+    return _segment_dicts(_detect_segments(df['gazeX'].to_numpy(dtype=np.float64),
+                                           df['gazeY'].to_numpy(dtype=np.float64),
+                                           df['timestamp'].to_numpy(dtype=np.float64),
+                                           vel_thresh, min_duration_ms))
+
+@njit(cache=True)
+def _first_time_inside_radius(ts, gx, gy, cx, cy, radius, t_min):
+    # first gaze sample after t_min inside the radius; NaN when none
+    # (no fastmath: it would let LLVM assume the NaN return never happens)
+    # ts is sorted: binary-search past t_min instead of testing every sample
+    r2 = radius * radius
+    for i in range(np.searchsorted(ts, t_min, side='right'), ts.size):
+        dx = gx[i] - cx
+        dy = gy[i] - cy
+        if dx*dx + dy*dy <= r2:
+            return ts[i]
+    return np.nan
+
+def first_time_inside_radius(ts: np.ndarray,
+                             gx: np.ndarray,
+                             gy: np.ndarray,
                              center: Tuple[float, float],
                              radius: float,
                              t_min: float) -> Optional[float]:
-    mask = df['timestamp'] > t_min
-    sub = df.loc[mask]
-    if sub.empty:
-        return None
-    dx = sub['gazeX'].to_numpy() - center[0]
-    dy = sub['gazeY'].to_numpy() - center[1]
-    dist = np.hypot(dx, dy)
-    idx = np.argmax(dist <= radius) if np.any(dist <= radius) else None
-    if idx is None:
-        return None
-    # np.argmax gives first True index in the filtered array
-    return float(sub['timestamp'].iloc[idx])
+    t = _first_time_inside_radius(ts, gx, gy, float(center[0]), float(center[1]),
+                                  float(radius), float(t_min))
+    return None if np.isnan(t) else float(t)
+
+@njit(cache=True, fastmath=True)
+def _movement_start_toward_target(mx, my, ts, tx, ty, spawn_t, sim_th, vel_th):
+    # scalar form of movement_start_toward_target; -1 when not found
+    prev_x = mx[0]
+    prev_y = my[0]
+    prev_t = ts[0]
+    for i in range(1, ts.size):
+        x = mx[i]
+        y = my[i]
+        t = ts[i]
+        mvx = x - prev_x
+        mvy = y - prev_y
+        tvx = tx - prev_x
+        tvy = ty - prev_y
+        dt = t - prev_t
+        prev_x = x
+        prev_y = y
+        prev_t = t
+        if t <= spawn_t:
+            continue
+        step = (mvx*mvx + mvy*mvy) ** 0.5
+        if step / max(dt, 1e-6) < vel_th:
+            continue
+        tlen = (tvx*tvx + tvy*tvy) ** 0.5
+        if step == 0.0 or tlen == 0.0:
+            sim = 0.0
+        else:
+            sim = (mvx*tvx + mvy*tvy) / (step * tlen)
+        if sim > sim_th:
+            return i
+    return -1
 
-def movement_start_toward_target(df: pd.DataFrame,
+def movement_start_toward_target(ts: np.ndarray,
+                                 mx: np.ndarray,
+                                 my: np.ndarray,
                                  target: Tuple[float, float],
                                  spawn_time: float,
                                  similarity_thresh: float,
@@ -174,25 +208,39 @@ def movement_start_toward_target(df: pd.DataFrame,
     """
     Find index where mouse starts moving toward target after spawn_time
     using direction cosine similarity and velocity threshold.
-    Returns index in df or None.
+    Returns index into the arrays or None.
     """
-    x = df['mouseX'].to_numpy()
-    y = df['mouseY'].to_numpy()
-    t = df['timestamp'].to_numpy()
-    for i in range(1, len(df)):
-        if t[i] <= spawn_time:
-            continue
-        mv = (x[i] - x[i-1], y[i] - y[i-1])
-        tv = (target[0] - x[i-1], target[1] - y[i-1])
-        speed = euclidean(x[i-1], y[i-1], x[i], y[i]) / max(t[i] - t[i-1], 1e-6)
-        if speed < vel_thresh:
-            continue
-        sim = cosine_similarity(mv, tv)
-        if sim > similarity_thresh:
-            return i
-    return None
-
-def closest_approach_index(df: pd.DataFrame,
+    if ts.size == 0:
+        return None
+    i = _movement_start_toward_target(mx, my, ts, float(target[0]), float(target[1]),
+                                      float(spawn_time), similarity_thresh, vel_thresh)
+    return None if i < 0 else int(i)
+
+@njit(cache=True, fastmath=True)
+def _closest_approach_index(ts, mx, my, tx, ty, start_idx, search_ms):
+    # window covers every sample with t0 <= t <= t0 + search_ms (ts is sorted);
+    # squared distance has the same argmin, so no sqrt per sample
+    t0 = ts[start_idx]
+    lo = np.searchsorted(ts, t0, side='left')
+    hi = np.searchsorted(ts, t0 + search_ms, side='right')
+    # seeded from the first sample (lo <= start_idx < hi) rather than inf,
+    # which fastmath lets LLVM assume never occurs
+    best_idx = lo
+    dx = mx[lo] - tx
+    dy = my[lo] - ty
+    best = dx*dx + dy*dy
+    for i in range(lo + 1, hi):
+        dx = mx[i] - tx
+        dy = my[i] - ty
+        d2 = dx*dx + dy*dy
+        if d2 < best:
+            best = d2
+            best_idx = i
+    return best_idx
+
+def closest_approach_index(ts: np.ndarray,
+                           mx: np.ndarray,
+                           my: np.ndarray,
                            target: Tuple[float, float],
                            start_idx: int,
                            search_ms: int) -> Optional[int]:
@@ -201,53 +249,93 @@ def closest_approach_index(df: pd.DataFrame,
     """
     if start_idx is None:
         return None
-    t0 = df['timestamp'].iloc[start_idx]
-    sub = df.loc[df['timestamp'].between(t0, t0 + search_ms, inclusive='both')]
-    if sub.empty:
-        return None
-    dx = sub['mouseX'].to_numpy() - target[0]
-    dy = sub['mouseY'].to_numpy() - target[1]
-    dist = np.hypot(dx, dy)
-    j = int(np.argmin(dist))
-    return int(sub.index[j])
-
-def smoothness_jitter(df: pd.DataFrame, pos_cols=('mouseX','mouseY'), micro_thresh: float = 5.0) -> Tuple[float, float]:
-    xs = df[pos_cols[0]].to_numpy()
-    ys = df[pos_cols[1]].to_numpy()
-    # micro-movements magnitude per sample
-    mags = np.hypot(np.diff(xs, prepend=xs[0]), np.diff(ys, prepend=ys[0]))
-    micro = mags[mags < micro_thresh]
-    jitter = float(np.std(micro, ddof=1)) if len(micro) > 1 else 0.0
+    j = _closest_approach_index(ts, mx, my, float(target[0]), float(target[1]),
+                                int(start_idx), float(search_ms))
+    return None if j < 0 else int(j)
+
+@njit(cache=True)
+def _smoothness_jitter(xs, ys, micro_thresh):
+    # One pass: Welford mean/M2 over micro-movement magnitudes (the first
+    # sample has displacement 0) and the running sum of curvature |v[i] - v[i-1]|.
+    n = xs.size
+    k = 0
+    mean = 0.0
+    m2 = 0.0
+    if n > 0 and 0.0 < micro_thresh:
+        k = 1
+    sum_curv = 0.0
+    pvx = 0.0
+    pvy = 0.0
+    for i in range(1, n):
+        vx = xs[i] - xs[i-1]
+        vy = ys[i] - ys[i-1]
+        m = math.sqrt(vx*vx + vy*vy)
+        if m < micro_thresh:
+            k += 1
+            delta = m - mean
+            mean += delta / k
+            m2 += delta * (m - mean)
+        ax = vx - pvx
+        ay = vy - pvy
+        sum_curv += math.sqrt(ax*ax + ay*ay)
+        pvx = vx
+        pvy = vy
+    jitter = math.sqrt(m2 / (k - 1)) if k > 1 else 0.0
     # smoothness proxy: inverse of average curvature (higher = smoother)
-    if len(xs) < 3:
-        smooth = 0.0
-    else:
-        v1x = np.diff(xs, prepend=xs[0])
-        v1y = np.diff(ys, prepend=ys[0])
-        v2x = np.diff(v1x, prepend=v1x[0])
-        v2y = np.diff(v1y, prepend=v1y[0])
-        curvature = np.hypot(v2x, v2y)
-        mean_curv = float(np.mean(curvature[1:])) if len(curvature) > 1 else 0.0
-        smooth = 1.0 / (mean_curv + 1e-6)
+    smooth = 1.0 / (sum_curv / (n - 1) + 1e-6) if n >= 3 else 0.0
     return smooth, jitter
 
-def path_straightness(df: pd.DataFrame,
-                      start_idx: int,
-                      end_idx: int) -> float:
-    xs = df['mouseX'].iloc[start_idx:end_idx+1].to_numpy()
-    ys = df['mouseY'].iloc[start_idx:end_idx+1].to_numpy()
-    if len(xs) < 2:
+def smoothness_jitter(xs: np.ndarray, ys: np.ndarray, micro_thresh: float = 5.0) -> Tuple[float, float]:
+    smooth, jitter = _smoothness_jitter(xs, ys, float(micro_thresh))
+    return float(smooth), float(jitter)
+
+@njit(cache=True, fastmath=True)
+def _path_straightness(xs, ys):
+    n = xs.size
+    if n < 2:
         return 0.0
-    direct = euclidean(xs[0], ys[0], xs[-1], ys[-1])
-    pl = path_length(xs, ys)
-    if pl == 0:
+    pl = _path_length(xs, ys)
+    if pl == 0.0:
         return 0.0
-    return float(direct / pl)  # 1.0 = perfectly straight
+    return math.hypot(xs[n-1] - xs[0], ys[n-1] - ys[0]) / pl  # 1.0 = perfectly straight
+
+def path_straightness(xs: np.ndarray,
+                      ys: np.ndarray,
+                      start_idx: int,
+                      end_idx: int) -> float:
+    return float(_path_straightness(xs[start_idx:end_idx+1], ys[start_idx:end_idx+1]))
+
+@njit(cache=True)
+def _flick_metrics(ts, mx, my, cx, cy, radius, start, end):
+    # accuracy, overshoot, undershoot, smoothness, peak velocity and straightness
+    # of the flick mx/my[start:end+1] toward the target (cx, cy)
+    acc = math.hypot(mx[end] - cx, my[end] - cy)
+    # Overshoot / undershoot: did the cursor cross past the target center along movement axis?
+    mvx = mx[end] - mx[start]
+    mvy = my[end] - my[start]
+    tvx = cx - mx[start]
+    tvy = cy - my[start]
+    proj_len = (mvx*tvx + mvy*tvy) / (math.hypot(mvx, mvy) + 1e-6)
+    target_len = math.hypot(tvx, tvy)
+    overshoot = 1.0 if proj_len > target_len else 0.0
+    undershoot = 1.0 if proj_len < target_len and acc > radius else 0.0
+
+    xs = mx[start:end+1]
+    ys = my[start:end+1]
+    smooth, _ = _smoothness_jitter(xs, ys, 5.0)
+    peak_v = 0.0
+    for i in range(start + 1, end + 1):
+        dt = ts[i] - ts[i-1]
+        if dt != 0.0:
+            v = math.hypot(mx[i] - mx[i-1], my[i] - my[i-1]) / dt
+            if v > peak_v:
+                peak_v = v
+    return acc, overshoot, undershoot, smooth, peak_v, _path_straightness(xs, ys)
 
 # ---------------------------- Metrics ----------------------------
 
-@dataclass
-class Params:
+class Params(NamedTuple):
+    # A NamedTuple (not a dataclass) so it can be passed straight into the jitted kernels.
     target_radius: float = 50.0          # px
     mouse_vel_thresh: float = 0.05       # px/ms (adjust to your sampling rate)
     gaze_vel_thresh: float = 0.05        # px/ms
@@ -257,52 +345,50 @@ class Params:
     sync_time_window_ms: int = 100       # gaze<->mouse movement alignment window
     sync_dir_sim_thresh: float = 0.8
 
-def compute_gaze_reaction_time(df: pd.DataFrame, p: Params) -> Optional[float]:
-    center = (float(df['targetX'].iloc[0]), float(df['targetY'].iloc[0]))
-    spawn_time = float(df['timestamp'].iloc[0])
-    t = first_time_inside_radius(df, center, p.target_radius, spawn_time)
+@dataclass
+class TaskArrays:
+    """
+    Sample columns as contiguous float arrays, sorted by timestamp within a task.
+    float32 columns are kept as float32 (half the memory traffic in the kernels);
+    anything else is converted to float64.
+    """
+    ts: np.ndarray
+    tx: np.ndarray
+    ty: np.ndarray
+    gx: np.ndarray
+    gy: np.ndarray
+    mx: np.ndarray
+    my: np.ndarray
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'TaskArrays':
+        cols = ['timestamp','targetX','targetY','gazeX','gazeY','mouseX','mouseY']
+        return cls(*(np.ascontiguousarray(df[c].to_numpy(),
+                                          dtype=np.float32 if df[c].dtype == np.float32 else np.float64)
+                     for c in cols))
+
+def compute_gaze_reaction_time(a: TaskArrays, p: Params) -> Optional[float]:
+    center = (float(a.tx[0]), float(a.ty[0]))
+    spawn_time = float(a.ts[0])
+    t = first_time_inside_radius(a.ts, a.gx, a.gy, center, p.target_radius, spawn_time)
     return None if t is None else t - spawn_time
 
-def compute_flick_metrics(df: pd.DataFrame, p: Params) -> Dict[str, Optional[float]]:
-    center = (float(df['targetX'].iloc[0]), float(df['targetY'].iloc[0]))
-    spawn_time = float(df['timestamp'].iloc[0])
+def compute_flick_metrics(a: TaskArrays, p: Params) -> Dict[str, Optional[float]]:
+    center = (float(a.tx[0]), float(a.ty[0]))
+    spawn_time = float(a.ts[0])
 
-    start_idx = movement_start_toward_target(df, center, spawn_time,
+    start_idx = movement_start_toward_target(a.ts, a.mx, a.my, center, spawn_time,
                                              similarity_thresh=p.toward_sim_thresh,
                                              vel_thresh=p.mouse_vel_thresh)
     if start_idx is None:
         return {k: None for k in ['accuracy','overshoot','undershoot','smoothness','peakVelocity','straightness']}
 
-    end_idx = closest_approach_index(df, center, start_idx, p.search_window_ms)
+    end_idx = closest_approach_index(a.ts, a.mx, a.my, center, start_idx, p.search_window_ms)
     if end_idx is None or end_idx <= start_idx:
         return {k: None for k in ['accuracy','overshoot','undershoot','smoothness','peakVelocity','straightness']}
 
-    # Accuracy = distance at closest approach
-    acc = euclidean(df['mouseX'].iloc[end_idx], df['mouseY'].iloc[end_idx], center[0], center[1])
-
-    # Overshoot / undershoot: compare path extremum vs target line
-    # Simple proxy: did the cursor cross past the target center along movement axis?
-    start_pos = (df['mouseX'].iloc[start_idx], df['mouseY'].iloc[start_idx])
-    end_pos = (df['mouseX'].iloc[end_idx], df['mouseY'].iloc[end_idx])
-    mv = vector(start_pos, end_pos)
-    tv = vector(start_pos, center)
-    proj_len = dot(mv, tv) / (norm(mv) + 1e-6)
-    target_len = norm(tv)
-    overshoot = float(proj_len > target_len)
-    undershoot = float(proj_len < target_len and acc > p.target_radius)
-
-    # Smoothness & peak velocity in segment
-    seg = df.iloc[start_idx:end_idx+1]
-    smooth, jitter = smoothness_jitter(seg, pos_cols=('mouseX','mouseY'))
-    # peak velocity
-    dx = seg['mouseX'].diff().fillna(0.0).to_numpy()
-    dy = seg['mouseY'].diff().fillna(0.0).to_numpy()
-    dt = seg['timestamp'].diff().fillna(1.0).to_numpy()
-    dt[dt == 0] = np.nan
-    vel = np.nan_to_num(np.hypot(dx, dy) / dt, nan=0.0)
-    peak_v = float(np.max(vel)) if len(vel) else 0.0
-
-    straight = path_straightness(df, start_idx, end_idx)
+    acc, overshoot, undershoot, smooth, peak_v, straight = _flick_metrics(
+        a.ts, a.mx, a.my, center[0], center[1], float(p.target_radius), start_idx, end_idx)
 
     return {
         'accuracy': float(acc),
@@ -313,26 +399,18 @@ def compute_flick_metrics(df: pd.DataFrame, p: Params) -> Dict[str, Optional[flo
         'straightness': float(straight)
     }
 
-def compute_tracking_stability(df: pd.DataFrame, p: Params) -> Dict[str, Optional[float]]:
-    # Generic static-target proxy: track accuracy over a sliding window (if target moves, this still works)
-    dx = df['mouseX'].to_numpy() - df['targetX'].to_numpy()
-    dy = df['mouseY'].to_numpy() - df['targetY'].to_numpy()
-    dist = np.hypot(dx, dy)
-    tracking_accuracy = float(np.mean(dist)) if len(dist) else None
+def compute_tracking_stability(a: TaskArrays, p: Params) -> Dict[str, Optional[float]]:
+    # Generic static-target proxy: track accuracy over a sliding window (if target moves, this still works);
+    # predictive tracking proxy: mean alignment of mouse and target velocity.
+    # Same reduction as the batched path, over a single task.
+    if len(a.ts):
+        acc, pred = _tracking_batch(a, np.array([0, len(a.ts)], dtype=np.int64))
+        tracking_accuracy, prediction_score = float(acc[0]), float(pred[0])
+    else:
+        tracking_accuracy = prediction_score = None
 
     # jitter index (micro movement std)
-    smooth, jitter = smoothness_jitter(df, pos_cols=('mouseX','mouseY'))
-
-    # predictive tracking proxy: correlation between mouse velocity and target velocity (lead/lag)
-    mvx = df['mouseX'].diff().fillna(0.0).to_numpy()
-    mvy = df['mouseY'].diff().fillna(0.0).to_numpy()
-    tvx = df['targetX'].diff().fillna(0.0).to_numpy()
-    tvy = df['targetY'].diff().fillna(0.0).to_numpy()
-    # Use dot-product alignment over time
-    dot_align = mvx*tvx + mvy*tvy
-    denom = (np.hypot(mvx, mvy) * np.hypot(tvx, tvy)) + 1e-6
-    align_cos = dot_align / denom
-    prediction_score = float(np.nanmean(align_cos)) if len(align_cos) else None
+    smooth, jitter = smoothness_jitter(a.mx, a.my)
 
     return {
         'trackingAccuracy': tracking_accuracy,
@@ -340,73 +418,259 @@ def compute_tracking_stability(df: pd.DataFrame, p: Params) -> Dict[str, Optiona
         'predictionScore': prediction_score
     }
 
-def compute_gaze_aim_latency(df: pd.DataFrame, p: Params) -> Dict[str, Optional[float]]:
-    center = (float(df['targetX'].iloc[0]), float(df['targetY'].iloc[0]))
-    spawn_time = float(df['timestamp'].iloc[0])
+def compute_gaze_aim_latency(a: TaskArrays,
+                             p: Params,
+                             flick: Optional[Dict[str, Optional[float]]] = None) -> Dict[str, Optional[float]]:
+    center = (float(a.tx[0]), float(a.ty[0]))
+    spawn_time = float(a.ts[0])
     # gaze arrival
-    gaze_t = first_time_inside_radius(df, center, p.target_radius, spawn_time)
+    gaze_t = first_time_inside_radius(a.ts, a.gx, a.gy, center, p.target_radius, spawn_time)
     # mouse movement start
-    start_idx = movement_start_toward_target(df, center, spawn_time,
+    start_idx = movement_start_toward_target(a.ts, a.mx, a.my, center, spawn_time,
                                              similarity_thresh=p.toward_sim_thresh,
                                              vel_thresh=p.mouse_vel_thresh)
     if gaze_t is None or start_idx is None:
         return {'latency': None, 'efficiency': None}
 
-    mouse_start_t = float(df['timestamp'].iloc[start_idx])
+    mouse_start_t = float(a.ts[start_idx])
     latency = mouse_start_t - float(gaze_t)
 
-    # Efficiency proxy: straightness from (mouse_start) to closest approach
-    end_idx = closest_approach_index(df, center, start_idx, p.search_window_ms)
-    if end_idx is None or end_idx <= start_idx:
-        efficiency = None
+    # Efficiency proxy: straightness from (mouse_start) to closest approach.
+    # compute_flick_metrics measures it over the same window, so reuse its value.
+    if flick is not None:
+        efficiency = flick['straightness']
     else:
-        efficiency = path_straightness(df, start_idx, end_idx)
+        end_idx = closest_approach_index(a.ts, a.mx, a.my, center, start_idx, p.search_window_ms)
+        if end_idx is None or end_idx <= start_idx:
+            efficiency = None
+        else:
+            efficiency = path_straightness(a.mx, a.my, start_idx, end_idx)
 
     return {'latency': float(latency), 'efficiency': efficiency if efficiency is None else float(efficiency)}
 
-def compute_sync_rate(df: pd.DataFrame, p: Params) -> Optional[float]:
-    gm = detect_gaze_movements(df, vel_thresh=p.gaze_vel_thresh, min_duration_ms=p.min_move_duration_ms)
-    mm = detect_movements(df, vel_thresh=p.mouse_vel_thresh, min_duration_ms=p.min_move_duration_ms)
-    if not gm:
-        return None
+def compute_sync_rate(a: TaskArrays, p: Params) -> Optional[float]:
+    rate = _sync_rate(a.ts, a.gx, a.gy, a.mx, a.my, p.gaze_vel_thresh, p.mouse_vel_thresh,
+                      p.min_move_duration_ms, p.sync_time_window_ms, p.sync_dir_sim_thresh)
+    return None if np.isnan(rate) else float(rate)
+
+# ---------------------------- Batched kernels ----------------------------
+# The kernels below compute every metric of compute_all_metrics for many tasks
+# at once. Input is one contiguous float32/float64 array per column (sorted by
+# taskId, then timestamp) plus `offsets`, where task g spans rows offsets[g]:offsets[g+1].
+# Missing values are NaN instead of None.
+
+METRIC_COLS = [
+    'gazeReactionTime_ms',
+    'flick_accuracy', 'flick_overshoot', 'flick_undershoot',
+    'flick_smoothness', 'flick_peakVelocity', 'flick_straightness',
+    'track_trackingAccuracy', 'track_jitterIndex', 'track_predictionScore',
+    'gazeAimLatency_ms', 'movementEfficiency',
+    'syncRate',
+]
+
+SPATIAL_COLS = ['avgGazeTargetDist', 'avgMouseTargetDist', 'avgGazeMouseGap']
+
+@njit(cache=True)
+def _sync_rate(ts, gx, gy, mx, my, gaze_vel, mouse_vel, min_dur, sync_win, sync_sim):
+    # share of gaze segments with a mouse segment starting within sync_win ms
+    # in a similar direction; NaN when there are no gaze segments
+    n = ts.size
+    g_s = np.empty(n, dtype=np.int64)
+    g_e = np.empty(n, dtype=np.int64)
+    m_s = np.empty(n, dtype=np.int64)
+    m_e = np.empty(n, dtype=np.int64)
+    ng = _segments(ts, gx, gy, gaze_vel, min_dur, g_s, g_e)
+    nm = _segments(ts, mx, my, mouse_vel, min_dur, m_s, m_e)
+    if ng == 0:
+        return np.nan
+    m_t = ts[m_s[:nm]]
     sync = 0
-    for g in gm:
-        # find mouse movement within time window
-        candidates = [m for m in mm if abs(m['startTime'] - g['startTime']) <= p.sync_time_window_ms]
-        ok = False
-        for m in candidates:
-            if cosine_similarity(g['direction'], m['direction']) >= p.sync_dir_sim_thresh:
-                ok = True
+    for a in range(ng):
+        g_t = ts[g_s[a]]
+        g_dx = gx[g_e[a]] - gx[g_s[a]]
+        g_dy = gy[g_e[a]] - gy[g_s[a]]
+        gn = math.hypot(g_dx, g_dy)
+        # mouse segment start times are sorted: scan only the time window
+        lo = np.searchsorted(m_t, g_t - sync_win)
+        for b in range(lo, nm):
+            if m_t[b] > g_t + sync_win:
                 break
-        if ok:
-            sync += 1
-    return float(sync) / float(len(gm)) if gm else None
+            m_dx = mx[m_e[b]] - mx[m_s[b]]
+            m_dy = my[m_e[b]] - my[m_s[b]]
+            mn = math.hypot(m_dx, m_dy)
+            sim = 0.0
+            if gn != 0.0 and mn != 0.0:
+                sim = (g_dx*m_dx + g_dy*m_dy) / (gn * mn)
+            if sim >= sync_sim:
+                sync += 1
+                break
+    return sync / ng
+
+@njit(cache=True)
+def _task_metrics(ts, tx, ty, gx, gy, mx, my, params, row):
+    (radius, mouse_vel, gaze_vel, min_dur,
+     toward_sim, search_ms, sync_win, sync_sim) = params
+    # float64 center, as in the per-task functions (tx/ty may be float32)
+    cx = np.float64(tx[0])
+    cy = np.float64(ty[0])
+    spawn = ts[0]
+
+    # 1) Gaze reaction time: first gaze sample inside the target after spawn
+    gaze_t = _first_time_inside_radius(ts, gx, gy, cx, cy, radius, spawn)
+    row[0] = gaze_t - spawn
+
+    # 2) Flick: movement start toward target, then closest approach
+    start = _movement_start_toward_target(mx, my, ts, cx, cy, spawn, toward_sim, mouse_vel)
+    end = -1
+    if start >= 0:
+        end = _closest_approach_index(ts, mx, my, cx, cy, start, search_ms)
+        if end <= start:
+            end = -1
+
+    straight = np.nan
+    if end >= 0:
+        acc, overshoot, undershoot, smooth, peak_v, straight = _flick_metrics(
+            ts, mx, my, cx, cy, radius, start, end)
+        row[1] = acc
+        row[2] = overshoot
+        row[3] = undershoot
+        row[4] = smooth
+        row[5] = peak_v
+        row[6] = straight
+    else:
+        row[1:7] = np.nan
+
+    # 3) Tracking stability: jitter only; accuracy and prediction score are
+    # computed for all tasks at once in _tracking_batch
+    _, jitter = _smoothness_jitter(mx, my, 5.0)
+    row[8] = jitter
+
+    # 4) Gaze-aim latency (+ efficiency), reusing the searches above
+    if not np.isnan(gaze_t) and start >= 0:
+        row[10] = ts[start] - gaze_t
+        row[11] = straight
+    else:
+        row[10] = np.nan
+        row[11] = np.nan
+
+    # 5) Synchronization rate
+    row[12] = _sync_rate(ts, gx, gy, mx, my, gaze_vel, mouse_vel, min_dur, sync_win, sync_sim)
+
+@njit(parallel=True, cache=True)
+def _compute_all(ts, tx, ty, gx, gy, mx, my, offsets, params, out):
+    # tasks are independent and each writes only its own row of `out`
+    for g in prange(offsets.size - 1):
+        s = offsets[g]
+        e = offsets[g+1]
+        _task_metrics(ts[s:e], tx[s:e], ty[s:e], gx[s:e], gy[s:e],
+                      mx[s:e], my[s:e], params, out[g])
+    return out
+
+@njit(parallel=True, cache=True)
+def _spatial_sync(tx, ty, gx, gy, mx, my, offsets, out):
+    # mean gaze->target, mouse->target and |gaze - mouse| distance per task, one pass
+    for g in prange(offsets.size - 1):
+        s_gd = 0.0
+        s_md = 0.0
+        s_gap = 0.0
+        for i in range(offsets[g], offsets[g+1]):
+            dx = gx[i] - tx[i]
+            dy = gy[i] - ty[i]
+            gd = math.sqrt(dx*dx + dy*dy)
+            dx = mx[i] - tx[i]
+            dy = my[i] - ty[i]
+            md = math.sqrt(dx*dx + dy*dy)
+            s_gd += gd
+            s_md += md
+            s_gap += abs(gd - md)
+        n = offsets[g+1] - offsets[g]
+        out[g, 0] = s_gd / n
+        out[g, 1] = s_md / n
+        out[g, 2] = s_gap / n
+    return out
+
+def task_offsets(task_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    For taskIds sorted ascending, return (unique taskIds, offsets) where
+    task g spans rows offsets[g]:offsets[g+1].
+    """
+    tids, first_idx = np.unique(task_ids, return_index=True)
+    return tids, np.append(first_idx, len(task_ids)).astype(np.int64)
+
+def _tracking_batch(a: TaskArrays, offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    trackingAccuracy and predictionScore for every task: per-sample values over
+    the whole dataset, reduced per task with np.add.reduceat on the offsets.
+    """
+    starts = offsets[:-1]
+    counts = np.diff(offsets)
+    dist = np.hypot(a.mx - a.tx, a.my - a.ty)
+    mvx = np.diff(a.mx, prepend=a.mx[:1])
+    mvy = np.diff(a.my, prepend=a.my[:1])
+    tvx = np.diff(a.tx, prepend=a.tx[:1])
+    tvy = np.diff(a.ty, prepend=a.ty[:1])
+    align = (mvx*tvx + mvy*tvy) / (np.hypot(mvx, mvy) * np.hypot(tvx, tvy) + 1e-6)
+    # the first sample of a task has no velocity (not a diff across tasks)
+    align[starts] = 0.0
+    return (np.add.reduceat(dist, starts, dtype=np.float64) / counts,
+            np.add.reduceat(align, starts, dtype=np.float64) / counts)
+
+def compute_metrics_batch(df: pd.DataFrame, params: Params) -> pd.DataFrame:
+    """
+    Compute all metrics for every taskId in df in a single kernel pass.
+    Returns one row per taskId with METRIC_COLS followed by 'taskId'.
+    """
+    df = df.sort_values(['taskId', 'timestamp'], kind='mergesort')
+    a = TaskArrays.from_frame(df)
+    tids, offsets = task_offsets(df['taskId'].to_numpy())
+    # preallocated (ntasks, nmetrics) matrix; a metric the kernel leaves unset stays NaN
+    out = np.full((len(tids), len(METRIC_COLS)), np.nan, dtype=np.float64)
+    _compute_all(a.ts, a.tx, a.ty, a.gx, a.gy, a.mx, a.my,
+                 offsets, params, out)
+    if len(tids):
+        (out[:, METRIC_COLS.index('track_trackingAccuracy')],
+         out[:, METRIC_COLS.index('track_predictionScore')]) = _tracking_batch(a, offsets)
+    return pd.DataFrame(out, columns=METRIC_COLS).assign(taskId=tids)
+
+def compute_spatial_sync_batch(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Mean gaze-target distance, mouse-target distance and gaze-mouse gap
+    for every taskId in df. Returns one row per taskId.
+    """
+    df = df.sort_values('taskId', kind='mergesort')
+    a = TaskArrays.from_frame(df)
+    tids, offsets = task_offsets(df['taskId'].to_numpy())
+    out = np.empty((len(tids), len(SPATIAL_COLS)), dtype=np.float64)
+    _spatial_sync(a.tx, a.ty, a.gx, a.gy, a.mx, a.my, offsets, out)
+    result = pd.DataFrame(out, columns=SPATIAL_COLS)
+    result.insert(0, 'taskId', tids)
+    return result
 
 # ---------------------------- Runner ----------------------------
 
 def compute_all_metrics(df_task: pd.DataFrame, params: Params) -> Dict[str, Optional[float]]:
     out = {}
-    # sort by time (safety)
-    df_task = df_task.sort_values('timestamp').reset_index(drop=True)
+    # sort by time (safety); stable, so ties keep the order compute_metrics_batch sees
+    a = TaskArrays.from_frame(df_task.sort_values('timestamp', kind='mergesort'))
 
     # 1) Gaze Reaction Time
-    out['gazeReactionTime_ms'] = compute_gaze_reaction_time(df_task, params)
+    out['gazeReactionTime_ms'] = compute_gaze_reaction_time(a, params)
 
     # 2) Flick Accuracy & Patterns
-    flick = compute_flick_metrics(df_task, params)
+    flick = compute_flick_metrics(a, params)
     out.update({f'flick_{k}': v for k, v in flick.items()})
 
     # 3) Tracking Stability
-    track = compute_tracking_stability(df_task, params)
+    track = compute_tracking_stability(a, params)
     out.update({f'track_{k}': v for k, v in track.items()})
 
     # 4) Gaze–Aim Latency (+ efficiency)
-    gal = compute_gaze_aim_latency(df_task, params)
+    gal = compute_gaze_aim_latency(a, params, flick)
     out['gazeAimLatency_ms'] = gal['latency']
     out['movementEfficiency'] = gal['efficiency']
 
     # 5) Synchronization Rate
-    out['syncRate'] = compute_sync_rate(df_task, params)
+    out['syncRate'] = compute_sync_rate(a, params)
 
     return out
 
@@ -449,17 +713,8 @@ def main():
         sync_dir_sim_thresh=args.sync_dir_sim
     )
 
-    # group by taskId
-    results = []
-    for tid, g in df.groupby('taskId', sort=True):
-        try:
-            metrics = compute_all_metrics(g, params)
-        except Exception as e:
-            metrics = { 'error': str(e) }
-        metrics['taskId'] = tid
-        results.append(metrics)
-
-    out_df = pd.DataFrame(results).sort_values('taskId')
+    # one kernel pass over all tasks (rows grouped by taskId via offsets)
+    out_df = compute_metrics_batch(df, params)
     out_df.to_csv(args.out, index=False)
     print(f"Saved: {args.out}")
     # also print head
@@ -467,5 +722,10 @@ def main():
         print(out_df.head())
 
 if __name__ == '__main__':
+    # Run main from analysis.syncgaze_metrics rather than __main__ so the numba
+    # on-disk cache is keyed to one module name however the CLI is launched.
+    if not __package__:
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from analysis.syncgaze_metrics import main
     main()
 
@@ -0,0 +1,134 @@
+"""
+Metrics against hand-computed values and the committed 101_ver output, and
+the batched kernel (compute_metrics_batch) against the per-task functions
+(compute_all_metrics).
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analysis import analyze_101
+from analysis import syncgaze_metrics as sm
+
+HERE = Path(__file__).resolve().parent
+
+
+def synthetic_tasks(n_tasks: int = 40, n_samples: int = 120, seed: int = 0) -> pd.DataFrame:
+    """Noisy flicks toward a fixed target per task, with repeated timestamps."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for tid in range(n_tasks):
+        # ~30% of steps are 0 ms, so many timestamps repeat
+        steps = rng.choice([0.0, 8.0, 16.0], size=n_samples, p=[0.3, 0.5, 0.2])
+        ts = 1000.0 * tid + np.cumsum(steps)
+        target = rng.uniform(100, 900, size=2)
+        start = rng.uniform(100, 900, size=2)
+        frac = np.clip(np.linspace(-0.2, 1.2, n_samples), 0, 1)[:, None]
+        mouse = start + frac * (target - start) + rng.normal(0, 3, (n_samples, 2))
+        gaze = start + np.sqrt(frac) * (target - start) + rng.normal(0, 20, (n_samples, 2))
+        frames.append(pd.DataFrame({
+            'timestamp': ts, 'taskId': tid,
+            'targetX': target[0], 'targetY': target[1],
+            'gazeX': gaze[:, 0], 'gazeY': gaze[:, 1],
+            'mouseX': mouse[:, 0], 'mouseY': mouse[:, 1],
+        }))
+    # shuffled rows: both paths must sort, and ties must come out the same way
+    return pd.concat(frames).sample(frac=1.0, random_state=seed).reset_index(drop=True)
+
+
+def per_task(df: pd.DataFrame, params: sm.Params) -> pd.DataFrame:
+    rows = []
+    for tid, g in df.groupby('taskId'):
+        m = sm.compute_all_metrics(g, params)
+        m['taskId'] = tid
+        rows.append(m)
+    return pd.DataFrame(rows)
+
+
+def assert_same(batch: pd.DataFrame, single: pd.DataFrame):
+    np.testing.assert_array_equal(batch['taskId'], single['taskId'])
+    np.testing.assert_allclose(batch[sm.METRIC_COLS].to_numpy(dtype=float),
+                               single[sm.METRIC_COLS].to_numpy(dtype=float),
+                               rtol=1e-9, atol=1e-9)
+
+
+def test_batch_matches_per_task_with_tied_timestamps():
+    df = synthetic_tasks()
+    assert df.duplicated(['taskId', 'timestamp']).any()
+    for params in (sm.Params(),
+                   sm.Params(mouse_vel_thresh=0.5, toward_sim_thresh=0.3,
+                             search_window_ms=200, sync_time_window_ms=300)):
+        assert_same(sm.compute_metrics_batch(df, params), per_task(df, params))
+
+
+def test_batch_matches_per_task_float32():
+    df = synthetic_tasks(seed=1)
+    coords = ['targetX', 'targetY', 'gazeX', 'gazeY', 'mouseX', 'mouseY']
+    df = df.astype({c: np.float32 for c in coords})
+    assert_same(sm.compute_metrics_batch(df, sm.Params()), per_task(df, sm.Params()))
+
+
+def fixed_tasks() -> pd.DataFrame:
+    """
+    Task 1: gaze and mouse flick straight onto a target at (100, 0).
+    Task 2: gaze stays off target, mouse only jitters 1 px vertically.
+    """
+    ts = [0.0, 10.0, 20.0, 30.0, 40.0, 50.0]
+    flick = pd.DataFrame({'timestamp': ts, 'taskId': 1, 'targetX': 100.0, 'targetY': 0.0,
+                          'gazeX': [0.0, 40.0, 80.0, 100.0, 100.0, 100.0], 'gazeY': 0.0,
+                          'mouseX': [0.0, 0.0, 30.0, 60.0, 90.0, 100.0], 'mouseY': 0.0})
+    idle = pd.DataFrame({'timestamp': ts, 'taskId': 2, 'targetX': 100.0, 'targetY': 0.0,
+                         'gazeX': 500.0, 'gazeY': 500.0,
+                         'mouseX': 0.0, 'mouseY': [0.0, 1.0, 0.0, 1.0, 0.0, 1.0]})
+    return pd.concat([flick, idle], ignore_index=True)
+
+
+def test_known_values():
+    nan = np.nan
+    expected = pd.DataFrame([
+        {
+            # gaze enters the 50 px radius at t=20 (x=80)
+            'gazeReactionTime_ms': 20.0,
+            # movement starts at t=20 (x=30), closest approach at x=100
+            'flick_accuracy': 0.0, 'flick_overshoot': 0.0, 'flick_undershoot': 0.0,
+            # steps 30, 30, 10 px: curvature 30 + 0 + 20 over 3 steps
+            'flick_smoothness': 1.0 / (50.0 / 3 + 1e-6),
+            'flick_peakVelocity': 3.0, 'flick_straightness': 1.0,
+            'track_trackingAccuracy': (100 + 100 + 70 + 40 + 10 + 0) / 6,
+            'track_jitterIndex': 0.0, 'track_predictionScore': 0.0,
+            'gazeAimLatency_ms': 0.0, 'movementEfficiency': 1.0,
+            # one gaze segment (t=10..30), matched by the mouse segment starting at t=20
+            'syncRate': 1.0,
+        },
+        {
+            'gazeReactionTime_ms': nan,
+            'flick_accuracy': nan, 'flick_overshoot': nan, 'flick_undershoot': nan,
+            'flick_smoothness': nan, 'flick_peakVelocity': nan, 'flick_straightness': nan,
+            'track_trackingAccuracy': (3 * 100 + 3 * np.sqrt(100**2 + 1)) / 6,
+            # micro-movement magnitudes 0, 1, 1, 1, 1, 1: sample std = sqrt(1/6)
+            'track_jitterIndex': np.sqrt(1 / 6), 'track_predictionScore': 0.0,
+            'gazeAimLatency_ms': nan, 'movementEfficiency': nan,
+            'syncRate': nan,
+        },
+    ])
+    df = fixed_tasks()
+    got = sm.compute_metrics_batch(df, sm.Params())
+    np.testing.assert_array_equal(got['taskId'], [1, 2])
+    np.testing.assert_allclose(got[sm.METRIC_COLS].to_numpy(dtype=float),
+                               expected[sm.METRIC_COLS].to_numpy(), rtol=1e-9, atol=1e-9)
+    assert_same(got, per_task(df, sm.Params()))
+
+
+def test_float32_pipeline_matches_committed_101_metrics():
+    # metrics_full_101_ver.csv was produced from float64 samples; load_dataframe
+    # now stores coordinates as float32, which must stay within 1e-4.
+    df = analyze_101.load_dataframe(HERE / "gaze_mouse_task_data_(101_ver).csv")
+    assert df['gazeX'].dtype == np.float32
+    got = analyze_101.compute_metrics(df, sm.Params()).merge(
+        analyze_101.derive_spatial_sync(df), on="taskId", how="left")
+    expected = pd.read_csv(HERE / "metrics_full_101_ver.csv")
+    assert list(got.columns) == list(expected.columns)
+    np.testing.assert_allclose(got.to_numpy(dtype=float), expected.to_numpy(dtype=float),
+                               rtol=1e-4, atol=1e-4)